@@ -1,12 +1,18 @@
 import sys
 import os
+import logging
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 from src.apps.sender_app import run_sender
 from src.apps.receiver_app import run_receiver
+from src.core.game_net_api import start_log_listener
 
 def main():
+    # Show send/ACK/retransmit/reorder logs from the protocol layer
+    logging.basicConfig(level=logging.DEBUG, format="%(message)s", stream=sys.stdout)
+    start_log_listener()
+
     print("Advanced Game Transport Demo")
     print("1) Sender (sends realistic game data)")
     print("2) Receiver (logs with retransmit/reorder info)")
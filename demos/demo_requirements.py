@@ -1,12 +1,12 @@
 import sys
 import os
+import logging
 
 # Add the parent directory to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from emulator.emulator import Emulator
 from src.apps.emulator_options import E1_PACKETLOSS, E1_DELAY, E1_JITTER, E2_PACKETLOSS, E2_DELAY, E2_JITTER
-from src.core.game_net_api import GameNetAPI
+from src.core.game_net_api import GameNetAPI, start_log_listener
 import time
 import threading
 
@@ -17,10 +17,9 @@ def run_receiver():
     
     count = 0
     while count < 10:  # Show 10 packets then stop
-        packet = receiver.receive()
+        packet = receiver.receive(timeout=1.0)
         if packet:
             count += 1
-        time.sleep(0.1)
     
     metrics = receiver.get_metrics()
     print(f"[METRICS]: {metrics}")
@@ -52,19 +51,26 @@ def test_all_features():
     print("TESTING ALL RELIABILITY FEATURES")
     print("="*50)
 
+    # Imported here so options 1 and 2 run without the emulator's numpy dependency
+    from emulator.emulator import Emulator
+
     def start_emulator(listen_port, forward_host, target_port, loss_rate, base_delay, jitter):
         emulator = Emulator(listen_port, forward_host, target_port, loss_rate, base_delay, jitter)
         emulator.start()
 
+    # Set once the receiver's sockets are bound, so the sender starts straight away
+    receiver_ready = threading.Event()
+
     def test_receiver():
         receiver = GameNetAPI(port=8889, target_port=9998)
+        receiver_ready.set()
         received_packets = []
 
-        for _ in range(50):  # Extended to allow all ACKs to be sent back
-            packet = receiver.receive()
+        deadline = time.time() + 2.5  # Extended to allow all ACKs to be sent back
+        while time.time() < deadline:
+            packet = receiver.receive(timeout=deadline - time.time())
             if packet:
                 received_packets.append(packet.seq_no)
-            time.sleep(0.05)
 
         print(f"\n[TEST] Received packets in order: {received_packets[:10]}...")
         metrics = receiver.get_metrics()
@@ -75,7 +81,7 @@ def test_all_features():
         receiver.close()
 
     def test_sender():
-        time.sleep(0.5)  # Let receiver start
+        receiver_ready.wait(timeout=5.0)  # Let receiver start
         sender = GameNetAPI(port=8888, target_port=9999)
 
         # Test 1: Reliable vs Unreliable
@@ -123,6 +129,10 @@ def test_all_features():
     print("="*50)
 
 if __name__ == "__main__":
+    # Per-packet protocol logs are DEBUG-level; the demo opts in to show them
+    logging.basicConfig(level=logging.DEBUG, format="%(message)s", stream=sys.stdout)
+    start_log_listener()
+
     print("CS3103 REQUIREMENTS DEMO")
     print("1. Receiver (see packets arrive)")
     print("2. Sender (see both channels)")
@@ -1,8 +1,23 @@
+import heapq
+import itertools
+import os
+import signal
 import socket
-import random
+import sys
 import time
 import threading
 
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Kernel send/receive buffer size, shared with GameNetAPI so bursts queue
+# instead of being dropped
+from src.core.constants import SOCKET_BUFFER_SIZE
+
+# Loss/delay draws generated per NumPy batch
+RNG_POOL_SIZE = 4096
+
 class Emulator:
     def __init__(self, listen_port, forward_host, forward_port,
                  loss_rate=0.3, base_delay=0.05, jitter=0.01):
@@ -15,33 +30,77 @@ class Emulator:
 
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.sock.bind(("localhost", listen_port))
+        # One socket both receives and forwards
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
         self.running = True
 
-        self.sendsock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # Per-packet randomness comes from pools refilled in bulk by NumPy
+        self._rng = np.random.default_rng()
+        self._refill_pools()
+
+        # Packets waiting out their delay: min-heap of (deadline, tiebreak, data)
+        self._heap = []
+        self._ctr = itertools.count()
+        self._cv = threading.Condition()
 
     def start(self):
         print(f"[Emulator] Listening on port {self.listen_port}, forwarding to {self.forward_port}")
+        threading.Thread(target=self._drain_loop, daemon=True).start()
         threading.Thread(target=self.run, daemon=True).start()
 
+    def _refill_pools(self):
+        self._pool_idx = 0
+        self._loss_pool = self._rng.random(RNG_POOL_SIZE).tolist()
+        self._delay_pool = np.maximum(
+            0, self._rng.uniform(self.base_delay - self.jitter, self.base_delay + self.jitter, RNG_POOL_SIZE)
+        ).tolist()
+
     def run(self):
+        # One reused receive buffer; only packets that survive the loss draw are
+        # copied out, since they sit in the delay heap past the next receive
+        buf = bytearray(65535)
+        view = memoryview(buf)
         while self.running:
-            data, addr = self.sock.recvfrom(65535)
-            if random.random() < self.loss_rate:
+            nbytes, addr = self.sock.recvfrom_into(buf)
+
+            if self._pool_idx == RNG_POOL_SIZE:
+                self._refill_pools()
+            i = self._pool_idx
+            self._pool_idx = i + 1
+
+            if self._loss_pool[i] < self.loss_rate:
                 print("[Emulator] Dropped packet")
                 continue
 
-            delay = max(0, random.uniform(self.base_delay - self.jitter, self.base_delay + self.jitter))
-            self.delayed_send(data, delay)
+            self.delayed_send(bytes(view[:nbytes]), self._delay_pool[i])
 
     def delayed_send(self, data, delay):
-        time.sleep(delay)
-        self.sendsock.sendto(data, (self.forward_host, self.forward_port))
-        #print(f"[Emulator] Sent packet after {delay*1000:.1f} ms")
+        # Schedule only; _drain_loop does the send so the receive loop never sleeps
+        with self._cv:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._ctr), data))
+            self._cv.notify()
+
+    def _drain_loop(self):
+        while self.running:
+            with self._cv:
+                while self.running and not self._heap:
+                    self._cv.wait()
+                if not self.running:
+                    break
+                wait = self._heap[0][0] - time.monotonic()
+                if wait > 0:
+                    # Woken early by a push with a sooner deadline, or the wait expired
+                    self._cv.wait(wait)
+                    continue
+                _, _, data = heapq.heappop(self._heap)
+            self.sock.sendto(data, (self.forward_host, self.forward_port))
 
     def stop(self):
         self.running = False
+        with self._cv:
+            self._cv.notify()
         self.sock.close()
-        self.sendsock.close()
 
 # Example usage:
 # Emulate network between sender (8888) and receiver (8889)
@@ -49,6 +108,9 @@ if __name__ == "__main__":
     emulator = Emulator(listen_port=9999, forward_host="localhost", forward_port=8889,
                                loss_rate=0, base_delay=0.01, jitter=0.005)
     emulator.start()
-    while (True):
-        pass
+    # Block the main thread without spinning; the emulator runs on daemon threads
+    if hasattr(signal, "pause"):
+        signal.pause()
+    else:
+        threading.Event().wait()
     # Sender should send to port 9999 instead of 8889 now.
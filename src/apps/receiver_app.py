@@ -1,6 +1,6 @@
 from ..core.game_net_api import GameNetAPI
+from ..core.packet import timestamp_ms
 import json
-import time
 
 def run_receiver():
     api = GameNetAPI(port=8889, target_port=8888)
@@ -8,7 +8,7 @@ def run_receiver():
 
     try:
         while True:
-            result = api.receive()
+            result = api.receive(timeout=0.5)
             if result is None:
                 continue
 
@@ -16,14 +16,14 @@ def run_receiver():
             payload = result.payload
             seq_no = result.seq_no
             channel_type = result.channel_type
-            latency_ms = (time.time() - result.timestamp) * 1000
-            # print(f"timestamp: {result.timestamp}, time: {time.time()}")
+            latency_ms = (timestamp_ms() - result.timestamp) & 0xFFFFFFFF
             chan = "RELIABLE" if channel_type == 0 else "UNRELIABLE"
 
             try:
                 parsed = json.loads(payload)
                 payload_str = json.dumps(parsed, separators=(',', ':'))
-            except:
+            except ValueError:
+                # Not JSON; show the raw payload
                 payload_str = payload
 
             print(f"[RECV] #{seq_no} {chan}: {payload_str} ({latency_ms:.1f}ms)")
@@ -31,7 +31,7 @@ def run_sender(duration=30, packet_rate=20):
             payload = gen()
             reliable = is_reliable_event(payload)
 
-            api.send(payload, reliable=reliable, timestamp=int(time.time()))
+            api.send(payload, reliable=reliable)
 
             if time.time() - start_time < 3:  # only log first 3 sec
                 chan = "RELIABLE" if reliable else "UNRELIABLE"
@@ -9,4 +9,10 @@ RETRANSMIT_TIMEOUT = 0.15  # 150ms - Faster retransmission for high loss
 MAX_RETRANSMITS = 12  # 13 total attempts - handles up to 40% loss well
 REORDER_BUFFER_SIZE = 500  # Max out-of-order packets to buffer
 REORDER_TIMEOUT = 2.0  # 2000ms - Allows time for all retransmit attempts
-DUP_ACK_THRESHOLD = 3  # Number of duplicate ACKs to trigger fast retransmit 
\ No newline at end of file
+DUP_ACK_THRESHOLD = 3  # Number of duplicate ACKs to trigger fast retransmit
+RECV_BURST = 64  # Max datagrams drained per wakeup before timers get a turn
+SACK_BITS = 32  # Out-of-order packets reported per ACK beyond the cumulative point
+PENDING_RING_SIZE = 4096  # Unacked packets tracked by the sender; must be a power of two
+SOCKET_BUFFER_SIZE = 4 * 1024 * 1024  # SO_RCVBUF/SO_SNDBUF request; the kernel may cap it
+MAX_DATAGRAM_SIZE = 2048  # Largest datagram received intact; longer ones are dropped as truncated
+
@@ -1,54 +1,181 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import selectors
 import socket
-import time
 import threading
-from .packet import GamePacket
+import time
+from collections import deque
+from .packet import (GamePacket, HEADER_STRUCT, KIND_RELIABLE, KIND_ACK, KIND_UNRELIABLE,
+                     build_ack_bytes, timestamp_ms)
+from .udp_batch import RecvBatch, SendBatch
 from .constants import *
 from ..reliability.reorder_buffer import ReorderBuffer
 from ..reliability.reliable_channel import ReliableChannel
 
+logger = logging.getLogger(__name__)
+
+_log_listener = None
+_log_listener_lock = threading.Lock()
+
+
+class _RootForwarder(logging.Handler):
+    """Hands queued records to whatever handlers the root logger has at emit time"""
+
+    def emit(self, record):
+        logging.getLogger().handle(record)
+
+
+def start_log_listener():
+    """
+    Opt-in: route this package's log records through a queue so the root
+    handlers' stream I/O happens on a background listener thread rather than
+    on the send/receive threads. The calling thread still merges each record's
+    message with its args (QueueHandler.prepare) before queuing it.
+
+    The package logger stops propagating to root while this is active; the
+    listener hands records to root's handlers instead. Call it after
+    configuring logging, e.g. from an app's entry point. Started once per
+    process and stopped (flushing the queue) at exit
+    """
+    global _log_listener
+    with _log_listener_lock:
+        if _log_listener is not None:
+            return
+        log_queue = queue.SimpleQueue()
+        package_logger = logging.getLogger(__name__.split('.')[0])
+        package_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        package_logger.propagate = False
+        _log_listener = logging.handlers.QueueListener(log_queue, _RootForwarder())
+        _log_listener.start()
+        atexit.register(_log_listener.stop)
+
+
 class GameNetAPI:
-    def __init__(self, host='localhost', port=8888, target_port=8889):
+    def __init__(self, host='localhost', port=8888, target_port=8889, workers=1):
+        """
+        Args:
+            workers: Number of receive threads. Above 1, each thread gets its own
+                     SO_REUSEPORT socket on the same port and the kernel hashes
+                     incoming datagrams across them by source address. With the
+                     single peer this API talks to, every datagram hashes to the
+                     same socket, so extra workers bring no parallelism
+        """
         self.host = host
         self.port = port
         self.target_port = target_port
 
-        # Socket setup
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.socket.bind((host, port))
-        self.socket.settimeout(0.1)
+        if workers > 1 and not hasattr(socket, 'SO_REUSEPORT'):
+            logger.warning("[SETUP] SO_REUSEPORT not supported, using a single receive thread")
+            workers = 1
+
+        # Socket setup; these only receive
+        self.sockets = [self._open_socket(reuse_port=workers > 1) for _ in range(workers)]
+        self.socket = self.sockets[0]
+
+        # Peer address resolved once; retransmits pass it to sendto(), which
+        # would otherwise look up a name like 'localhost' on every call
+        self._target = (socket.gethostbyname(self.host), self.target_port)
+
+        # All sends go through a separate socket connected to the peer, so the
+        # kernel keeps the route and Python skips address handling per call. The
+        # receive sockets stay unconnected: replies may come from a port other
+        # than target_port, e.g. the return leg of an emulator pair
+        self._tx_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._tx_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
+        self._tx_socket.connect(self._target)
+        self._send = self._tx_socket.send
+
+        # Outgoing packets are packed in place into this buffer rather than
+        # through a GamePacket object; grown if a payload does not fit
+        self._txbuf = bytearray(1500)
+        self._txview = memoryview(self._txbuf)
+
+        # Receive threads sleep in select() until a datagram arrives, a retransmit
+        # or reorder-gap deadline passes, or send()/close() pokes the wakeup socket
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
 
         # Separate sequence numbers for reliable and unreliable channels
         self.reliable_seq = 0
         self.unreliable_seq = 0
 
         # Reliability components
-        self.reliable_channel = ReliableChannel(self.socket)
+        self.reliable_channel = ReliableChannel(self._tx_socket)
         # Pass duplicate ACK sending callback to reorder buffer
         self.reorder_buffer = ReorderBuffer(send_dup_ack_callback=self._send_dup_ack)
 
         # Track last ACKed sequence for duplicate ACK detection
         self.last_acked_seq = -1
 
+        # ACKs queued while a received batch is handled, then flushed together
+        # under _rx_lock with one sendmmsg where available. In-order data is
+        # acknowledged once per batch; _ack_pending marks that the receive
+        # state changed since the last queued ACK
+        self._ack_queue = []
+        self._ack_pending = False
+        # Cumulative point and SACK bitmap of the last queued ACK, and how many
+        # ACKs in a row have repeated that cumulative point. Those are the ones
+        # the peer counts as duplicates toward fast retransmit
+        self._last_ack_cum = -1
+        self._last_ack_sack = 0
+        self._dup_acks_sent = 0
+        self._ack_batch = SendBatch(n=RECV_BURST) if SendBatch.available() else None
+
+        # Receive handlers keyed by GamePacket.kind
+        self._dispatch = {
+            KIND_RELIABLE: self._handle_reliable_data,
+            KIND_ACK: self._handle_ack,
+            KIND_UNRELIABLE: self._handle_unreliable,
+        }
+
         # Metrics
         self.metrics = {
             'reliable_sent': 0,
             'unreliable_sent': 0,
-            'reliable_received': 0,
-            'unreliable_received': 0,
-            'acks_sent': 0,
-            'acks_received': 0,
-            'total_latency': 0,
-            'latency_count': 0,
             'packets_reordered': 0,
             'retransmissions': 0
         }
 
+        # Receive-side counters live outside the metrics dict and never need
+        # buffer_lock; they are flushed once per batch under _rx_lock
+        self.reliable_received = 0
+        self.unreliable_received = 0
+        self.acks_sent = 0
+        self.acks_received = 0
+        # (total_latency, latency_count) replaced as one tuple per batch, so
+        # get_metrics() always reads a matching pair without taking a lock
+        self._latency_stats = (0, 0)
+
         # Receive thread for background ACK processing
         self.running = True
-        self.receive_buffer = []
+        self.receive_buffer = deque()
         self.buffer_lock = threading.Lock()
-        self.receiver_thread = threading.Thread(target=self._receive_loop, daemon=True)
-        self.receiver_thread.start()
+        # Signalled whenever packets are added so receive() can block instead of polling
+        self._buf_cv = threading.Condition(self.buffer_lock)
+        # Serializes reorder buffer, ACK state and counter updates across receive
+        # threads; uncontended with a single worker
+        self._rx_lock = threading.Lock()
+        self.receiver_threads = [
+            threading.Thread(target=self._receive_loop, args=(sock,), daemon=True)
+            for sock in self.sockets
+        ]
+        self.receiver_thread = self.receiver_threads[0]
+        for thread in self.receiver_threads:
+            thread.start()
+
+    def _open_socket(self, reuse_port=False):
+        """Create a non-blocking UDP socket bound to this endpoint's port"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # Room for bursts to queue in the kernel instead of being dropped
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+        if reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((self.host, self.port))
+        sock.setblocking(False)
+        return sock
 
     def send(self, data, reliable=True, timestamp=None):
         """
@@ -68,124 +195,327 @@ class GameNetAPI:
             seq_no = self.unreliable_seq
             self.unreliable_seq = (self.unreliable_seq + 1) % 65536
 
-        packet = GamePacket(channel, seq_no, data, timestamp)
-        packet_bytes = packet.to_bytes()
-
-        # Send the packet
-        self.socket.sendto(packet_bytes, (self.host, self.target_port))
-
-        # Track for retransmission if reliable
+        if timestamp is None:
+            timestamp = timestamp_ms()
+        payload = data.encode('utf-8')
+        size = HEADER_SIZE + len(payload)
+        if size > len(self._txbuf):
+            self._txbuf = bytearray(size)
+            self._txview = memoryview(self._txbuf)
+        HEADER_STRUCT.pack_into(self._txbuf, 0, channel, seq_no, timestamp & 0xFFFFFFFF)
+        self._txbuf[HEADER_SIZE:size] = payload
+
+        # Send the packet. A connected UDP socket reports an ICMP port unreachable
+        # from an earlier datagram as ConnectionRefusedError; that datagram is
+        # simply lost, as it would have been on an unconnected socket
         if reliable:
-            self.reliable_channel.track_packet(packet_bytes, seq_no, (self.host, self.target_port))
+            # Retransmissions need their own copy of the serialized packet
+            packet_bytes = bytes(self._txview[:size])
+            # Track before sending: on a fast path the peer's cumulative ACK can
+            # arrive before _send returns, and an ACK for an untracked seq is lost
+            if self.reliable_channel.track_packet(packet_bytes, seq_no, self._target):
+                # First packet in flight: the receive loop has no retransmit deadline yet
+                self._wakeup_w.send(b'\0')
+            try:
+                self._send(packet_bytes)
+            except ConnectionRefusedError:
+                pass
             self.metrics['reliable_sent'] += 1
-            print(f"[SEND] R#{seq_no} RELIABLE: {data[:30]}... (tracked for ACK)")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("[SEND] R#%d RELIABLE: %s... (tracked for ACK)", seq_no, data[:30])
         else:
+            try:
+                self._send(self._txview[:size])
+            except ConnectionRefusedError:
+                pass
             self.metrics['unreliable_sent'] += 1
-            print(f"[SEND] U#{seq_no} UNRELIABLE: {data[:30]}...")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("[SEND] U#%d UNRELIABLE: %s...", seq_no, data[:30])
 
     def _send_dup_ack(self, last_in_order_seq):
         """
-        Send duplicate ACK for last in-order packet (Selective Repeat standard)
+        Immediately ACK an out-of-order arrival; the cumulative point is
+        unchanged, so the peer counts it as a duplicate ACK. Once the peer has
+        enough duplicates to fast-retransmit, further arrivals are folded into
+        the one ACK sent at the end of the batch
 
         Args:
             last_in_order_seq: Sequence number of last packet received in order
         """
-        dup_ack_packet = GamePacket.create_ack(last_in_order_seq)
-        self.socket.sendto(dup_ack_packet.to_bytes(), (self.host, self.target_port))
-        print(f"[DUP-ACK-SEND] Sent duplicate ACK for R#{last_in_order_seq}")
+        self._queue_ack(defer=True)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[DUP-ACK-SEND] Sent duplicate ACK for R#%d", last_in_order_seq)
+
+    def _queue_ack(self, defer=False):
+        """
+        Queue a cumulative + selective ACK for the current reorder buffer state
+
+        Once DUP_ACK_THRESHOLD duplicates of the current cumulative point have
+        been queued, the peer has all it needs to fast-retransmit, so during a
+        gap another duplicate is only worth sending if its SACK bitmap has news
 
-    def _receive_loop(self):
+        Args:
+            defer: For an immediate duplicate ACK: past the threshold, leave it
+                   to the end-of-batch ACK instead of queuing one now
+        """
+        cum_ack, sack_bitmap = self.reorder_buffer.ack_state()
+        if cum_ack == self._last_ack_cum:
+            if self._dup_acks_sent >= DUP_ACK_THRESHOLD:
+                if defer:
+                    self._ack_pending = True
+                    return
+                if sack_bitmap and sack_bitmap == self._last_ack_sack:
+                    # Nothing new while a gap is open. Without a gap (bitmap 0) a
+                    # repeat answers a retransmission, so it is always sent
+                    self._ack_pending = False
+                    return
+            self._dup_acks_sent += 1
+        else:
+            self._last_ack_cum = cum_ack
+            self._dup_acks_sent = 0
+        self._last_ack_sack = sack_bitmap
+        self._ack_pending = False
+        self._ack_queue.append(build_ack_bytes(cum_ack, sack_bitmap))
+
+    def _flush_acks(self):
+        """Send the ACKs queued while handling a batch; caller holds _rx_lock"""
+        acks = self._ack_queue
+        self.acks_sent += len(acks)
+        try:
+            if self._ack_batch is not None:
+                self._ack_batch.send(self._tx_socket, acks)
+            else:
+                for ack in acks:
+                    self._send(ack)
+        except ConnectionRefusedError:
+            # Peer not listening (yet); see send()
+            pass
+        finally:
+            acks.clear()
+
+    def _receive_loop(self, sock):
         """
-        Background thread for receiving packets and processing ACKs
+        Event loop for one socket: receives packets, processes ACKs and runs
+        the retransmit and reorder-gap timers, sleeping in select() until the
+        nearest of those is due
         """
+        # recvmmsg buffers for draining queued datagrams in one syscall (Linux only),
+        # otherwise a single buffer reused by recvfrom_into. The extra byte there
+        # is how an oversized datagram shows up, as recvfrom_into has no MSG_TRUNC
+        rx_batch = RecvBatch(n=RECV_BURST, buflen=MAX_DATAGRAM_SIZE) if RecvBatch.available() else None
+        rxbuf = bytearray(MAX_DATAGRAM_SIZE + 1)
+        sel = selectors.DefaultSelector()
+        sel.register(sock, selectors.EVENT_READ)
+        sel.register(self._wakeup_r, selectors.EVENT_READ)
+
         while self.running:
+            now = time.time()
+            retransmit_at = self.reliable_channel.next_deadline()
+            reorder_timeout = self.reorder_buffer.next_timeout()
+            timeout = reorder_timeout
+            reorder_at = None if reorder_timeout is None else now + reorder_timeout
+            if retransmit_at is not None:
+                until_retransmit = max(0.0, retransmit_at - now)
+                timeout = until_retransmit if timeout is None else min(timeout, until_retransmit)
+
+            datagrams = ()
             try:
-                data, addr = self.socket.recvfrom(1024)
-                packet = GamePacket.from_bytes(data)
-
-                if packet:
-                    # Calculate latency (current time - packet timestamp)
-                    current_time_ms = int(time.time() * 1000) & 0xFFFFFFFF
-                    latency = max(0, current_time_ms - packet.timestamp)
-                    if latency > 10000:  # If latency > 10 seconds, likely a timestamp issue
-                        latency = 0  # Default to 0 for display
-
-                    # Handle ACK packets (now part of reliable channel)
-                    if packet.is_ack():
-                        # Extract the acked sequence number from payload
-                        try:
-                            acked_seq = int(packet.payload.split(':')[1])
-
-
-                            print(f"[LATENCY] ACK#{acked_seq}--- {latency} ms")
-
-                            # Check if this is a duplicate ACK
-                            if acked_seq == self.last_acked_seq:
-                                # Duplicate ACK - may trigger fast retransmit
-                                self.reliable_channel.handle_duplicate_ack(acked_seq)
-                            else:
-                                # New ACK - process normally
-                                self.reliable_channel.acknowledge(acked_seq)
-                                self.last_acked_seq = acked_seq
-
-                            self.metrics['acks_received'] += 1
-                        except:
-                            print(f"[ACK] Invalid ACK format: {packet.payload}")
-
-                    # Handle reliable data packets (non-ACK)
-                    elif packet.channel_type == CHANNEL_RELIABLE and not packet.is_control_packet():
-                        # Send ACK immediately
-                        ack_packet = GamePacket.create_ack(packet.seq_no)
-                        print(f"[LATENCY] PKT#{packet.seq_no}--- {latency} ms")
-                        self.socket.sendto(ack_packet.to_bytes(), (self.host, self.target_port))
-                        self.metrics['acks_sent'] += 1
-                        print(f"[ACK] Sent ACK for packet R#{packet.seq_no}")
-
-                        # Add to reorder buffer
-                        ready_packets = self.reorder_buffer.add_packet(packet.seq_no, packet)
-
-                        # Add ready packets to receive buffer
-                        with self.buffer_lock:
-                            for p in ready_packets:
-                                self.receive_buffer.append(p)
-                                self.metrics['reliable_received'] += 1
-                                self.metrics['total_latency'] += latency
-                                self.metrics['latency_count'] += 1
-                                print(f"[RECV] R#{p.seq_no} RELIABLE (ordered): {p.payload[:30]}... ({latency:.1f}ms)")
-
-                    # Handle unreliable packets - deliver immediately
-                    elif packet.channel_type == CHANNEL_UNRELIABLE:
-                        with self.buffer_lock:
-                            self.receive_buffer.append(packet)
-                            self.metrics['unreliable_received'] += 1
-                            self.metrics['total_latency'] += latency
-                            self.metrics['latency_count'] += 1
-                            print(f"[RECV] U#{packet.seq_no} UNRELIABLE: {packet.payload[:30]}... ({latency:.1f}ms)")
-
-            except socket.timeout:
-                # Check for reorder timeout periodically
-                timeout_packets = self.reorder_buffer.check_timeout()
-                if timeout_packets:
-                    with self.buffer_lock:
-                        for p in timeout_packets:
-                            self.receive_buffer.append(p)
-                            self.metrics['reliable_received'] += 1
-                            print(f"[RECV] R#{p.seq_no} RELIABLE (after timeout): {p.payload[:30]}...")
-                continue
+                for key, _ in sel.select(timeout=timeout):
+                    if key.fileobj is sock:
+                        datagrams = self._recv_datagrams(sock, rx_batch, rxbuf)
+                    elif self.running:
+                        # Left unread after close() so every receive thread sees it
+                        self._drain_wakeup()
+                if datagrams:
+                    self._process_batch(datagrams)
             except Exception as e:
                 if self.running:
-                    print(f"[ERROR] Receive loop error: {e}")
+                    logger.error("[ERROR] Receive loop error: %s", e)
+                continue
+
+            now = time.time()
+            if retransmit_at is not None and now >= retransmit_at:
+                self.reliable_channel.tick()
+
+            if reorder_at is not None and now >= reorder_at:
+                # Gap deadline reached - skip the missing packet
+                with self._rx_lock:
+                    timeout_packets = self.reorder_buffer.check_timeout()
+                    if timeout_packets:
+                        with self._buf_cv:
+                            self.receive_buffer.extend(timeout_packets)
+                            self._buf_cv.notify()
+                        self.reliable_received += len(timeout_packets)
+                if logger.isEnabledFor(logging.DEBUG):
+                    for p in timeout_packets:
+                        logger.debug("[RECV] R#%d RELIABLE (after timeout): %s...", p.seq_no, p.payload[:30])
+
+        sel.close()
+
+    def _drain_wakeup(self):
+        """Consume wakeup bytes; another receive thread may already have taken them"""
+        try:
+            while self._wakeup_r.recv(64):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def _process_batch(self, datagrams):
+        """
+        Handle a batch of received datagrams, then publish delivered packets
+        and counter updates once for the whole batch. Runs under _rx_lock so
+        batches from different receive threads never interleave; it imposes
+        no order between sockets, which the reorder buffer handles for
+        reliable packets
+        """
+        dispatch = self._dispatch
+        with self._rx_lock:
+            deliver = []
+            seen = [0, 0, 0]       # packets handled, per kind
+            delivered = [0, 0, 0]  # packets handed to the app, per kind
+            lat_sum = 0
+            # One clock read per burst; _recv_datagrams has already read every
+            # datagram in it
+            now_ms = timestamp_ms()
+
+            for data, addr in datagrams:
+                try:
+                    packet = GamePacket.from_bytes(data)
+                    if not packet:
+                        continue
+                    handler = dispatch.get(packet.kind)
+                    if handler is None:
+                        continue
+
+                    # Calculate latency (current time - packet timestamp, modulo the 32-bit field)
+                    latency = (now_ms - packet.timestamp) & 0xFFFFFFFF
+
+                    ready_packets = handler(packet, latency)
+                    seen[packet.kind] += 1
+                    if ready_packets:
+                        deliver.extend(ready_packets)
+                        delivered[packet.kind] += len(ready_packets)
+                        lat_sum += latency * len(ready_packets)
+                except Exception as e:
+                    logger.error("[ERROR] Receive loop error: %s", e)
+
+            if self._ack_pending:
+                self._queue_ack()
+            if self._ack_queue:
+                self._flush_acks()
+
+            if deliver:
+                with self._buf_cv:
+                    self.receive_buffer.extend(deliver)
+                    self._buf_cv.notify()
+                total, count = self._latency_stats
+                self._latency_stats = (total + lat_sum, count + len(deliver))
+
+            # ACK packets deliver nothing; acks_sent is counted in _flush_acks
+            self.reliable_received += delivered[KIND_RELIABLE]
+            self.unreliable_received += delivered[KIND_UNRELIABLE]
+            self.acks_received += seen[KIND_ACK]
+
+    def _recv_datagrams(self, sock, rx_batch, rxbuf):
+        """
+        Read up to RECV_BURST datagrams already queued on a non-blocking
+        socket, with a single recvmmsg call where available. Anything left
+        over is picked up on the next pass, after due timers have run
+
+        Returns:
+            List of (data, addr) pairs, all read before this returns. With
+            recvmmsg, data is a memoryview into a reused buffer that is only
+            valid until the next call
+        """
+        if rx_batch is not None:
+            return rx_batch.recv(sock)
+        return self._recv_into(sock, rxbuf)
+
+    @staticmethod
+    def _recv_into(sock, rxbuf):
+        # Drained eagerly so the caller's one clock read comes after every
+        # datagram is in; each is copied out because rxbuf is reused
+        view = memoryview(rxbuf)
+        datagrams = []
+        for _ in range(RECV_BURST):
+            try:
+                nbytes, addr = sock.recvfrom_into(rxbuf)
+            except BlockingIOError:
+                break
+            if nbytes > MAX_DATAGRAM_SIZE:
+                logger.warning("[RECV] Dropping datagram longer than %d bytes from %s:%d",
+                               MAX_DATAGRAM_SIZE, addr[0], addr[1])
+                continue
+            datagrams.append((bytes(view[:nbytes]), addr))
+        return datagrams
+
+    def _handle_ack(self, packet, latency):
+        """
+        Process a cumulative + selective ACK from the peer; nothing is
+        delivered to the app
+        """
+        cum_ack = packet.ack_seq
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[LATENCY] ACK#%d--- %d ms", cum_ack, latency)
+
+        # How far the cumulative point moved, modulo the 16-bit sequence space
+        advance = (cum_ack - self.last_acked_seq) & 0xFFFF
+        if 0 < advance < 32768:
+            first_seq = (self.last_acked_seq + 1) & 0xFFFF
+            self.last_acked_seq = cum_ack
+        else:
+            if advance == 0:
+                # Duplicate ACK - may trigger fast retransmit
+                self.reliable_channel.handle_duplicate_ack(cum_ack)
+            # Duplicate or reordered ACK: only its selective bits can be new
+            first_seq = (cum_ack + 1) & 0xFFFF
+        self.reliable_channel.acknowledge_cumulative(first_seq, cum_ack, packet.sack_bitmap)
+        return ()
+
+    def _handle_reliable_data(self, packet, latency):
+        """
+        Run a reliable data packet through the reorder buffer and mark an ACK due
 
-    def receive(self):
+        Returns:
+            List of packets now ready for in-order delivery; the reorder buffer
+            reuses it, so _process_batch copies it out before the next packet
+        """
+        # Late duplicates are ACKed too, in case the peer lost our earlier ACK;
+        # an out-of-order arrival queues its ACK right away via _send_dup_ack
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[LATENCY] PKT#%d--- %d ms", packet.seq_no, latency)
+        self._ack_pending = True
+
+        # Add to reorder buffer
+        ready_packets = self.reorder_buffer.add_packet(packet.seq_no, packet)
+        if ready_packets and logger.isEnabledFor(logging.DEBUG):
+            for p in ready_packets:
+                logger.debug("[RECV] R#%d RELIABLE (ordered): %s... (%.1fms)",
+                             p.seq_no, p.payload[:30], latency)
+        return ready_packets
+
+    def _handle_unreliable(self, packet, latency):
+        """Unreliable packets are delivered as soon as they arrive"""
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[RECV] U#%d UNRELIABLE: %s... (%.1fms)",
+                         packet.seq_no, packet.payload[:30], latency)
+        return (packet,)
+
+    def receive(self, timeout=0):
         """
         Get next packet from receive buffer (application-level receive)
 
+        Args:
+            timeout: Seconds to wait for a packet; 0 returns immediately,
+                     None waits until a packet arrives or the API is closed
+
         Returns:
             GamePacket or None if no packets available
         """
-        with self.buffer_lock:
-            if self.receive_buffer:
-                return self.receive_buffer.pop(0)
+        with self._buf_cv:
+            if self._buf_cv.wait_for(lambda: self.receive_buffer or not self.running, timeout):
+                if self.receive_buffer:
+                    return self.receive_buffer.popleft()
         return None
 
     def get_metrics(self):
@@ -193,6 +523,11 @@ class GameNetAPI:
         Get performance metrics including reliability stats
         """
         metrics = self.metrics.copy()
+        metrics['reliable_received'] = self.reliable_received
+        metrics['unreliable_received'] = self.unreliable_received
+        metrics['acks_sent'] = self.acks_sent
+        metrics['acks_received'] = self.acks_received
+        metrics['total_latency'], metrics['latency_count'] = self._latency_stats
 
         # Add reliability channel stats
         channel_stats = self.reliable_channel.get_stats()
@@ -203,8 +538,8 @@ class GameNetAPI:
 
         # Add reorder buffer stats
         reorder_stats = self.reorder_buffer.get_stats()
-        metrics['packets_reordered'] = reorder_stats['reordered']
-        metrics['packets_buffered'] = reorder_stats['buffered']
+        metrics['packets_reordered'] = reorder_stats.reordered
+        metrics['packets_buffered'] = reorder_stats.buffered
 
         # Calculate average latency
         if metrics['latency_count'] > 0:
@@ -225,8 +560,16 @@ class GameNetAPI:
     def close(self):
         """Clean shutdown"""
         self.running = False
+        with self._buf_cv:
+            self._buf_cv.notify_all()
         self.reliable_channel.shutdown()
-        if self.receiver_thread.is_alive():
-            self.receiver_thread.join(timeout=1.0)
-        self.socket.close()
-        print("[SHUTDOWN] GameNetAPI closed cleanly")
\ No newline at end of file
+        self._wakeup_w.send(b'\0')
+        for thread in self.receiver_threads:
+            if thread.is_alive():
+                thread.join(timeout=1.0)
+        self._wakeup_r.close()
+        self._wakeup_w.close()
+        for sock in self.sockets:
+            sock.close()
+        self._tx_socket.close()
+        logger.info("[SHUTDOWN] GameNetAPI closed cleanly")
\ No newline at end of file
@@ -1,49 +1,98 @@
+import struct
 import time
 from .constants import HEADER_SIZE, CHANNEL_RELIABLE
 
+# Wire header: channel type (1B), sequence number (2B), timestamp (4B), big-endian
+HEADER_STRUCT = struct.Struct('>BHI')
+
+# ACK marker payload; the cumulative ACK travels in the header seq field and
+# an optional selective ACK bitmap follows the prefix as hex
+ACK_PREFIX = "ACK:"
+
+# Packet kinds: (channel_type << 1) | ack bit
+KIND_RELIABLE = 0
+KIND_ACK = 1
+KIND_UNRELIABLE = 2
+
+def timestamp_ms():
+    """
+    Current header timestamp: monotonic clock in ms, truncated to 32 bits
+    Monotonic time is shared by all processes on a host and never jumps backwards
+    """
+    return time.monotonic_ns() // 1_000_000 & 0xFFFFFFFF
+
+_ACK_PAYLOAD = ACK_PREFIX.encode('utf-8')
+
+def build_ack_bytes(seq_no, sack_bitmap=0):
+    """
+    Serialized ACK, packed directly without a GamePacket
+
+    Args:
+        seq_no: Cumulative ACK, the last sequence number delivered in order
+        sack_bitmap: Bit i acknowledges seq_no + 2 + i (see ReorderBuffer.ack_state)
+    """
+    header = HEADER_STRUCT.pack(CHANNEL_RELIABLE, seq_no, timestamp_ms())
+    if sack_bitmap:
+        return header + _ACK_PAYLOAD + b'%x' % sack_bitmap
+    return header + _ACK_PAYLOAD
+
 class GamePacket:
+    # Fixed attribute slots instead of a per-instance __dict__; one of these is
+    # allocated for every datagram received
+    __slots__ = ('channel_type', 'seq_no', 'payload', 'timestamp', 'ack_flag', 'kind')
+
     def __init__(self, channel_type, seq_no, payload, timestamp=None):
         self.channel_type = channel_type
         self.seq_no = seq_no
         self.payload = payload
         if timestamp is None:
-            self.timestamp = int(time.time() * 1000)
+            self.timestamp = timestamp_ms()
         else:
             self.timestamp = timestamp
+        # Precomputed once so the receive loop tests a field instead of calling is_ack()
+        self.ack_flag = channel_type == CHANNEL_RELIABLE and payload.startswith(ACK_PREFIX)
+        # Single int the receive loop dispatches on (see KIND_* above)
+        self.kind = (channel_type << 1) | self.ack_flag
 
     def to_bytes(self):
+        return self.pack_header(self.channel_type, self.seq_no, self.timestamp) + self.payload.encode('utf-8')
+
+    @staticmethod
+    def pack_header(channel_type, seq_no, timestamp):
         """7-byte header"""
-        header = bytes([
-            self.channel_type,
-            (self.seq_no >> 8) & 0xFF,
-            self.seq_no & 0xFF,
-            (self.timestamp >> 24) & 0xFF,
-            (self.timestamp >> 16) & 0xFF,
-            (self.timestamp >> 8) & 0xFF,
-            self.timestamp & 0xFF
-        ])
-        return header + self.payload.encode('utf-8')
+        return HEADER_STRUCT.pack(channel_type, seq_no, timestamp & 0xFFFFFFFF)
 
     def is_ack(self):
         """Check if this is an ACK packet (reliable channel with ACK: prefix)"""
-        return self.channel_type == CHANNEL_RELIABLE and self.payload.startswith("ACK:")
+        return self.ack_flag
 
     def is_control_packet(self):
         """Check if this is a control packet (ACK or other control messages)"""
-        return self.channel_type == CHANNEL_RELIABLE and self.payload.startswith("ACK:")
+        return self.ack_flag
+
+    @property
+    def ack_seq(self):
+        """Cumulative ACK carried by an ACK packet (the header seq field)"""
+        return self.seq_no
+
+    @property
+    def sack_bitmap(self):
+        """Selective ACK bitmap of an ACK packet; 0 if it carries none"""
+        bits = self.payload[len(ACK_PREFIX):]
+        return int(bits, 16) if bits else 0
 
     @classmethod
     def create_ack(cls, seq_no):
         """Create an ACK packet for the given sequence number"""
-        # ACK uses CHANNEL_RELIABLE with special payload prefix
-        return cls(CHANNEL_RELIABLE, seq_no, f"ACK:{seq_no}")
+        # ACK uses CHANNEL_RELIABLE with special payload prefix; seq_no is the acked packet
+        return cls(CHANNEL_RELIABLE, seq_no, ACK_PREFIX)
 
     @classmethod
     def from_bytes(cls, data):
         if len(data) < HEADER_SIZE:
             return None
-        channel_type = data[0]
-        seq_no = (data[1] << 8) | data[2]
-        timestamp = (data[3] << 24) | (data[4] << 16) | (data[5] << 8) | data[6]
-        payload = data[HEADER_SIZE:].decode('utf-8')
+        channel_type, seq_no, timestamp = HEADER_STRUCT.unpack_from(data, 0)
+        # str() decodes bytes and memoryviews alike, so callers can pass a
+        # view of a reused receive buffer without copying it first
+        payload = str(data[HEADER_SIZE:], 'utf-8')
         return cls(channel_type, seq_no, payload, timestamp)
\ No newline at end of file
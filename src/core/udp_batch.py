@@ -0,0 +1,216 @@
+"""
+Batched UDP receive and send
+Uses Linux recvmmsg(2) and sendmmsg(2) through ctypes to move several
+datagrams per syscall
+"""
+
+import ctypes
+import errno
+import logging
+import os
+import socket
+import sys
+
+MSG_DONTWAIT = 0x40
+MSG_TRUNC = 0x20
+
+logger = logging.getLogger(__name__)
+
+
+class _IOVec(ctypes.Structure):
+    _fields_ = [
+        ('iov_base', ctypes.c_void_p),
+        ('iov_len', ctypes.c_size_t),
+    ]
+
+
+class _SockAddrIn(ctypes.Structure):
+    _fields_ = [
+        ('sin_family', ctypes.c_ushort),
+        ('sin_port', ctypes.c_uint16),
+        ('sin_addr', ctypes.c_ubyte * 4),
+        ('sin_zero', ctypes.c_ubyte * 8),
+    ]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ('msg_name', ctypes.c_void_p),
+        ('msg_namelen', ctypes.c_uint32),
+        ('msg_iov', ctypes.POINTER(_IOVec)),
+        ('msg_iovlen', ctypes.c_size_t),
+        ('msg_control', ctypes.c_void_p),
+        ('msg_controllen', ctypes.c_size_t),
+        ('msg_flags', ctypes.c_int),
+    ]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [
+        ('msg_hdr', _MsgHdr),
+        ('msg_len', ctypes.c_uint),
+    ]
+
+
+def _load_libc(name, argtypes):
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        func = getattr(libc, name)
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = argtypes
+    func.restype = ctypes.c_int
+    return func
+
+
+_recvmmsg = _load_libc('recvmmsg', [ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint,
+                                    ctypes.c_int, ctypes.c_void_p])
+_sendmmsg = _load_libc('sendmmsg', [ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint,
+                                    ctypes.c_int])
+
+
+class RecvBatch:
+    """Preallocated recvmmsg state for one IPv4 UDP socket"""
+
+    def __init__(self, n: int = 32, buflen: int = 1536):
+        """
+        Args:
+            n: Maximum datagrams read per syscall
+            buflen: Size of each datagram buffer
+        """
+        self.n = n
+        self.buflen = buflen
+        # Python-owned buffers so received datagrams can be handed out as
+        # memoryviews; the ctypes arrays share their memory for the iovecs
+        self._bufs = [bytearray(buflen) for _ in range(n)]
+        self._cbufs = [(ctypes.c_char * buflen).from_buffer(buf) for buf in self._bufs]
+        self._views = [memoryview(buf) for buf in self._bufs]
+        self._addrs = (_SockAddrIn * n)()
+        self._iovs = (_IOVec * n)()
+        self._msgs = (_MMsgHdr * n)()
+
+        for i in range(n):
+            self._iovs[i].iov_base = ctypes.addressof(self._cbufs[i])
+            self._iovs[i].iov_len = buflen
+            hdr = self._msgs[i].msg_hdr
+            hdr.msg_name = ctypes.addressof(self._addrs[i])
+            hdr.msg_iov = ctypes.pointer(self._iovs[i])
+            hdr.msg_iovlen = 1
+
+    @staticmethod
+    def available() -> bool:
+        """True if recvmmsg can be used on this platform"""
+        return _recvmmsg is not None
+
+    def recv(self, sock):
+        """
+        Read every datagram already queued on the socket, up to n, without blocking
+
+        Returns:
+            List of (memoryview, (host, port)) tuples, empty if nothing is queued.
+            The views point into reused buffers and are only valid until the next call.
+            Datagrams longer than buflen are dropped rather than returned truncated
+        """
+        msgs = self._msgs
+        addr_len = ctypes.sizeof(_SockAddrIn)
+        for i in range(self.n):
+            msgs[i].msg_hdr.msg_namelen = addr_len
+
+        count = _recvmmsg(sock.fileno(), msgs, self.n, MSG_DONTWAIT, None)
+        if count < 0:
+            err = ctypes.get_errno()
+            if err in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                return []
+            raise OSError(err, os.strerror(err))
+
+        datagrams = []
+        for i in range(count):
+            addr = self._addrs[i]
+            if msgs[i].msg_hdr.msg_flags & MSG_TRUNC:
+                logger.warning("[RECV] Dropping datagram longer than %d bytes from %s:%d",
+                               self.buflen, socket.inet_ntoa(bytes(addr.sin_addr)),
+                               socket.ntohs(addr.sin_port))
+                continue
+            datagrams.append((
+                self._views[i][:msgs[i].msg_len],
+                (socket.inet_ntoa(bytes(addr.sin_addr)), socket.ntohs(addr.sin_port)),
+            ))
+        return datagrams
+
+
+class SendBatch:
+    """Preallocated sendmmsg state for IPv4 datagrams to a single destination"""
+
+    def __init__(self, n: int = 32):
+        """
+        Args:
+            n: Maximum datagrams written per syscall
+        """
+        self.n = n
+        self._addr = _SockAddrIn()
+        self._addr_key = None
+        self._iovs = (_IOVec * n)()
+        self._msgs = (_MMsgHdr * n)()
+
+        for i in range(n):
+            hdr = self._msgs[i].msg_hdr
+            hdr.msg_iov = ctypes.pointer(self._iovs[i])
+            hdr.msg_iovlen = 1
+
+    @staticmethod
+    def available() -> bool:
+        """True if sendmmsg can be used on this platform"""
+        return _sendmmsg is not None
+
+    def _set_addr(self, addr):
+        # Resolved only when the destination changes
+        if addr == self._addr_key:
+            return
+        host, port = addr
+        self._addr.sin_family = socket.AF_INET
+        self._addr.sin_port = socket.htons(port)
+        self._addr.sin_addr[:] = socket.inet_aton(socket.gethostbyname(host))
+        self._addr_key = addr
+
+    def send(self, sock, datagrams, addr=None):
+        """
+        Send every datagram in order, n per syscall
+
+        Args:
+            sock: IPv4 UDP socket to send from
+            datagrams: List of bytes objects
+            addr: (host, port) destination shared by all of them, or None
+                  to send to the peer of a connected socket
+
+        Raises:
+            OSError: As sendto would, e.g. BlockingIOError if the send buffer is full
+        """
+        if addr is None:
+            name, namelen = None, 0
+        else:
+            self._set_addr(addr)
+            name, namelen = ctypes.addressof(self._addr), ctypes.sizeof(_SockAddrIn)
+        fd = sock.fileno()
+        iovs = self._iovs
+        msgs = self._msgs
+        done = 0
+        while done < len(datagrams):
+            count = min(self.n, len(datagrams) - done)
+            for i in range(count):
+                hdr = msgs[i].msg_hdr
+                hdr.msg_name = name
+                hdr.msg_namelen = namelen
+                data = datagrams[done + i]
+                # Points at the bytes object's own buffer; the caller's list keeps it alive
+                iovs[i].iov_base = ctypes.cast(data, ctypes.c_void_p).value
+                iovs[i].iov_len = len(data)
+
+            sent = _sendmmsg(fd, msgs, count, 0)
+            if sent < 0:
+                err = ctypes.get_errno()
+                if err == errno.EINTR:
+                    continue
+                raise OSError(err, os.strerror(err))
+            done += sent
@@ -0,0 +1,34 @@
+# Augmenting declarations for reliable_channel.py; see reorder_buffer.pxd.
+# Build with: cythonize -i src/reliability/reliable_channel.py
+
+cdef class PendingPacket:
+    cdef public object packet_data
+    cdef public int seq_no
+    cdef public object destination
+    cdef public double send_time
+    cdef public double first_send_time
+    cdef public int retry_count
+    cdef public bint acked
+
+cdef class ReliableChannel:
+    cdef public object socket
+    cdef list _ring
+    cdef int _ring_mask
+    cdef Py_ssize_t _pending_count
+    cdef public object lock
+    cdef list _deadlines
+    cdef public dict dup_ack_count
+    cdef public Py_ssize_t sent_count
+    cdef public Py_ssize_t acked_count
+    cdef public Py_ssize_t retransmitted_count
+    cdef public Py_ssize_t failed_count
+    cdef public Py_ssize_t total_retries
+    cdef public Py_ssize_t fast_retransmits
+    cdef public bint running
+
+    cpdef bint track_packet(self, object packet_data, int seq_no, object destination)
+    cpdef object acknowledge(self, int seq_no)
+    cpdef int acknowledge_cumulative(self, int first_seq, int cum_ack, unsigned long long sack_bitmap=*)
+    cdef PendingPacket _pending(self, int seq_no)
+    cdef _remove(self, int seq_no)
+    cdef object _acknowledge(self, int seq_no)
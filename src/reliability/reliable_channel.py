@@ -1,25 +1,33 @@
+# cython: annotation_typing=False
 """
 Reliable Channel Manager
 Handles ACKs, retransmissions, and packet tracking
 """
 
+import heapq
+import logging
 import time
 import threading
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from core.constants import RETRANSMIT_TIMEOUT, MAX_RETRANSMITS, DUP_ACK_THRESHOLD
+from core.constants import RETRANSMIT_TIMEOUT, MAX_RETRANSMITS, DUP_ACK_THRESHOLD, PENDING_RING_SIZE
+
+logger = logging.getLogger(__name__)
 
 class PendingPacket:
     """Track a packet awaiting ACK"""
+    __slots__ = ('packet_data', 'seq_no', 'destination', 'send_time', 'first_send_time',
+                 'retry_count', 'acked')
+
     def __init__(self, packet_data: bytes, seq_no: int, destination):
         self.packet_data = packet_data
         self.seq_no = seq_no
         self.destination = destination
         self.send_time = time.time()
-        self.first_send_time = time.time()  # Track original send time for true latency
+        self.first_send_time = self.send_time  # Track original send time for true latency
         self.retry_count = 0
         self.acked = False
 
@@ -29,31 +37,37 @@ class ReliableChannel:
         Initialize reliable channel manager
 
         Args:
-            socket_ref: Reference to the UDP socket for sending
+            socket_ref: UDP socket connected to the peer; packets are resent with send(),
+                        since sendto() with an address fails on a connected socket on BSD/macOS
         """
         self.socket = socket_ref
-        self.pending_packets: Dict[int, PendingPacket] = {}
+        # Unacknowledged packets in a fixed ring indexed by seq_no & _ring_mask;
+        # a slot only counts as holding seq_no if the packet's own seq_no matches
+        self._ring: List[Optional[PendingPacket]] = [None] * PENDING_RING_SIZE
+        self._ring_mask = PENDING_RING_SIZE - 1
+        self._pending_count = 0
         self.lock = threading.Lock()
+        # Min-heap of (retransmit deadline, seq_no). ACKed or removed packets are
+        # not taken out; their entries are skipped when they reach the top
+        self._deadlines: List[Tuple[float, int]] = []
 
         # Duplicate ACK tracking for fast retransmit
         self.dup_ack_count: Dict[int, int] = {}  # {seq_no: duplicate_count}
 
-        # Statistics
-        self.stats = {
-            'sent': 0,
-            'acked': 0,
-            'retransmitted': 0,
-            'failed': 0,
-            'total_retries': 0,
-            'fast_retransmits': 0
-        }
+        # Statistics, as plain counters rather than a dict behind the lock;
+        # get_stats() readers tolerate a snapshot that is a packet or two stale
+        self.sent_count = 0
+        self.acked_count = 0
+        self.retransmitted_count = 0
+        self.failed_count = 0
+        self.total_retries = 0
+        self.fast_retransmits = 0
 
-        # Start retransmission timer thread
+        # No timer thread: the owner's event loop sleeps until next_deadline()
+        # and then calls tick()
         self.running = True
-        self.timer_thread = threading.Thread(target=self._retransmission_timer, daemon=True)
-        self.timer_thread.start()
 
-    def track_packet(self, packet_data: bytes, seq_no: int, destination):
+    def track_packet(self, packet_data: bytes, seq_no: int, destination) -> bool:
         """
         Add packet to pending list for ACK tracking
 
@@ -61,10 +75,27 @@ class ReliableChannel:
             packet_data: The complete packet bytes
             seq_no: Sequence number
             destination: (host, port) tuple
+
+        Returns:
+            True if nothing was pending before, i.e. an event loop waiting on
+            next_deadline() has no timer armed and needs waking
         """
         with self.lock:
-            self.pending_packets[seq_no] = PendingPacket(packet_data, seq_no, destination)
-            self.stats['sent'] += 1
+            was_idle = self._pending_count == 0
+            packet = PendingPacket(packet_data, seq_no, destination)
+            slot = seq_no & self._ring_mask
+            if self._ring[slot] is None:
+                self._pending_count += 1
+            else:
+                # More than PENDING_RING_SIZE packets in flight: the oldest is given
+                # up on, exactly as if it had run out of retransmits
+                logger.warning("[RETRANSMIT] Pending ring full, packet R#%d failed untracked",
+                               self._ring[slot].seq_no)
+                self.failed_count += 1
+            self._ring[slot] = packet
+            heapq.heappush(self._deadlines, (packet.send_time + RETRANSMIT_TIMEOUT, seq_no))
+            self.sent_count += 1
+        return was_idle
 
     def acknowledge(self, seq_no: int):
         """
@@ -77,26 +108,72 @@ class ReliableChannel:
             total_latency: End-to-end latency in ms (from first send to ACK)
         """
         with self.lock:
-            if seq_no in self.pending_packets:
-                packet = self.pending_packets[seq_no]
-                if not packet.acked:
-                    packet.acked = True
-                    rtt = (time.time() - packet.send_time) * 1000  # Last attempt RTT
-                    total_latency = (time.time() - packet.first_send_time) * 1000  # True end-to-end
-                    self.stats['acked'] += 1
-                    print(f"[ACK] Received ACK for packet R#{seq_no} (RTT: {rtt:.1f}ms, Total: {total_latency:.1f}ms)")
-                    # Remove from pending
-                    del self.pending_packets[seq_no]
-                    # Clear duplicate ACK count for this sequence
-                    if seq_no in self.dup_ack_count:
-                        del self.dup_ack_count[seq_no]
-                    return total_latency
-            else:
-                # This might be a duplicate ACK for an already acknowledged packet
-                # Don't call handle_duplicate_ack here - it should be called from game_net_api
-                pass
+            return self._acknowledge(seq_no)
+
+    def acknowledge_cumulative(self, first_seq: int, cum_ack: int, sack_bitmap: int = 0) -> int:
+        """
+        Acknowledge every packet from first_seq through cum_ack (wrapping at
+        65536), plus those flagged in a selective ACK bitmap, under one lock
+
+        Args:
+            first_seq: First sequence number not covered by earlier cumulative ACKs;
+                       cum_ack + 1 if this ACK does not advance the cumulative point
+            cum_ack: Last sequence number the receiver delivered in order
+            sack_bitmap: Bit i acknowledges cum_ack + 2 + i
+
+        Returns:
+            Number of pending packets acknowledged
+        """
+        acked = 0
+        with self.lock:
+            seq_no = first_seq
+            stop = (cum_ack + 1) % 65536
+            while seq_no != stop:
+                if self._acknowledge(seq_no) is not None:
+                    acked += 1
+                seq_no = (seq_no + 1) % 65536
+
+            seq_no = (cum_ack + 2) % 65536
+            while sack_bitmap:
+                if sack_bitmap & 1 and self._acknowledge(seq_no) is not None:
+                    acked += 1
+                sack_bitmap >>= 1
+                seq_no = (seq_no + 1) % 65536
+        return acked
+
+    def _pending(self, seq_no: int) -> Optional[PendingPacket]:
+        """Pending packet for seq_no, or None; caller holds self.lock"""
+        packet = self._ring[seq_no & self._ring_mask]
+        if packet is not None and packet.seq_no == seq_no:
+            return packet
         return None
 
+    def _remove(self, seq_no: int):
+        """Free seq_no's ring slot; caller holds self.lock and has checked _pending()"""
+        self._ring[seq_no & self._ring_mask] = None
+        self._pending_count -= 1
+
+    def _acknowledge(self, seq_no: int):
+        """acknowledge() body; caller holds self.lock"""
+        packet = self._pending(seq_no)
+        if packet is None or packet.acked:
+            # Already acknowledged (or never sent) - nothing to do
+            return None
+        packet.acked = True
+        now = time.time()
+        rtt = (now - packet.send_time) * 1000  # Last attempt RTT
+        total_latency = (now - packet.first_send_time) * 1000  # True end-to-end
+        self.acked_count += 1
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[ACK] Received ACK for packet R#%d (RTT: %.1fms, Total: %.1fms)",
+                         seq_no, rtt, total_latency)
+        # Remove from pending
+        self._remove(seq_no)
+        # Clear duplicate ACK count for this sequence
+        if seq_no in self.dup_ack_count:
+            del self.dup_ack_count[seq_no]
+        return total_latency
+
     def handle_duplicate_ack(self, ack_seq_no: int):
         """
         Handle duplicate ACK - may trigger fast retransmit if threshold reached
@@ -113,91 +190,129 @@ class ReliableChannel:
             self.dup_ack_count[ack_seq_no] += 1
             dup_count = self.dup_ack_count[ack_seq_no]
 
-            print(f"[DUP-ACK] Received duplicate ACK #{dup_count} for R#{ack_seq_no}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("[DUP-ACK] Received duplicate ACK #%d for R#%d", dup_count, ack_seq_no)
 
             # Fast retransmit after DUP_ACK_THRESHOLD duplicate ACKs
             if dup_count >= DUP_ACK_THRESHOLD:
                 # The missing packet is likely ack_seq_no + 1
                 missing_seq = (ack_seq_no + 1) % 65536
 
-                if missing_seq in self.pending_packets:
-                    packet = self.pending_packets[missing_seq]
+                packet = self._pending(missing_seq)
+                if packet is not None:
                     if not packet.acked and packet.retry_count < MAX_RETRANSMITS:
                         # Fast retransmit - immediately retransmit without waiting for timeout
-                        self.socket.sendto(packet.packet_data, packet.destination)
+                        try:
+                            self.socket.send(packet.packet_data)
+                        except ConnectionRefusedError:
+                            # Earlier ICMP port unreachable; this copy is lost like any other
+                            pass
                         packet.retry_count += 1
                         packet.send_time = time.time()  # Reset timer
-                        self.stats['fast_retransmits'] += 1
-                        self.stats['retransmitted'] += 1
-                        self.stats['total_retries'] += 1
+                        self.fast_retransmits += 1
+                        self.retransmitted_count += 1
+                        self.total_retries += 1
 
                         # Reset duplicate ACK count after fast retransmit
                         self.dup_ack_count[ack_seq_no] = 0
 
-                        print(f"[FAST-RETRANSMIT] Immediately retransmitting R#{missing_seq} "
-                              f"after {DUP_ACK_THRESHOLD} duplicate ACKs "
-                              f"(attempt {packet.retry_count}/{MAX_RETRANSMITS})")
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("[FAST-RETRANSMIT] Immediately retransmitting R#%d "
+                                         "after %d duplicate ACKs (attempt %d/%d)",
+                                         missing_seq, DUP_ACK_THRESHOLD, packet.retry_count, MAX_RETRANSMITS)
                     elif packet.acked:
-                        print(f"[DUP-ACK] Packet R#{missing_seq} already ACKed, ignoring")
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("[DUP-ACK] Packet R#%d already ACKed, ignoring", missing_seq)
                     else:
-                        print(f"[DUP-ACK] Max retransmits reached for R#{missing_seq}")
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("[DUP-ACK] Max retransmits reached for R#%d", missing_seq)
                 else:
-                    print(f"[DUP-ACK] Missing packet R#{missing_seq} not in pending list")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("[DUP-ACK] Missing packet R#%d not in pending list", missing_seq)
 
-    def _retransmission_timer(self):
+    def next_deadline(self) -> Optional[float]:
         """
-        Background thread that checks for packets needing retransmission
+        Earliest retransmit deadline (time.time() clock) among unacknowledged
+        packets, or None if nothing is pending
         """
-        while self.running:
-            current_time = time.time()
-            packets_to_retry = []
+        deadlines = self._deadlines
+        with self.lock:
+            while deadlines:
+                deadline, seq_no = deadlines[0]
+                packet = self._pending(seq_no)
+                if packet is not None and not packet.acked:
+                    return deadline
+                heapq.heappop(deadlines)
+            return None
 
-            with self.lock:
-                for seq_no, packet in list(self.pending_packets.items()):
-                    if packet.acked:
-                        continue
+    def tick(self):
+        """
+        Retransmit every packet whose timeout has expired and give up on those
+        out of attempts. Called by the owner's event loop at next_deadline()
+        """
+        current_time = time.time()
+        packets_to_retry = []
+        deadlines = self._deadlines
 
-                    time_elapsed = current_time - packet.send_time
+        with self.lock:
+            # Only entries that are due are touched
+            while deadlines and deadlines[0][0] <= current_time:
+                _, seq_no = heapq.heappop(deadlines)
+                packet = self._pending(seq_no)
+                if packet is None or packet.acked:
+                    continue
 
-                    if time_elapsed >= RETRANSMIT_TIMEOUT:
-                        if packet.retry_count < MAX_RETRANSMITS:
-                            packets_to_retry.append(packet)
-                        else:
-                            # Max retries reached, give up
-                            print(f"[RETRANSMIT] Packet R#{seq_no} failed after {MAX_RETRANSMITS} retries")
-                            self.stats['failed'] += 1
-                            del self.pending_packets[seq_no]
+                due = packet.send_time + RETRANSMIT_TIMEOUT
+                if due > current_time:
+                    # Timer was reset by a fast retransmit; requeue at the new deadline
+                    heapq.heappush(deadlines, (due, seq_no))
+                    continue
 
-            # Retransmit outside the lock to avoid blocking
-            for packet in packets_to_retry:
-                self._retransmit_packet(packet)
+                if packet.retry_count < MAX_RETRANSMITS:
+                    # Claimed under the lock so concurrent ticks never resend it twice
+                    packet.retry_count += 1
+                    packet.send_time = current_time  # Reset timer
+                    heapq.heappush(deadlines, (current_time + RETRANSMIT_TIMEOUT, seq_no))
+                    packets_to_retry.append(packet)
+                else:
+                    # Max retries reached, give up
+                    logger.warning("[RETRANSMIT] Packet R#%d failed after %d retries",
+                                   seq_no, MAX_RETRANSMITS)
+                    self.failed_count += 1
+                    self._remove(seq_no)
 
-            # Check every 50ms for efficiency
-            time.sleep(0.05)
+        # Retransmit outside the lock to avoid blocking
+        for packet in packets_to_retry:
+            self._retransmit_packet(packet)
 
     def _retransmit_packet(self, packet: PendingPacket):
         """
-        Retransmit a packet
+        Resend a packet already claimed by tick()
         """
-        packet.retry_count += 1
-        packet.send_time = time.time()  # Reset timer
-
         try:
-            self.socket.sendto(packet.packet_data, packet.destination)
-            self.stats['retransmitted'] += 1
-            self.stats['total_retries'] += 1
-            print(f"[RETRANSMIT] Packet R#{packet.seq_no} lost, attempt {packet.retry_count}/{MAX_RETRANSMITS} "
-                  f"({RETRANSMIT_TIMEOUT * 1000:.0f}ms timeout)")
+            self.socket.send(packet.packet_data)
+            self.retransmitted_count += 1
+            self.total_retries += 1
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("[RETRANSMIT] Packet R#%d lost, attempt %d/%d (%.0fms timeout)",
+                             packet.seq_no, packet.retry_count, MAX_RETRANSMITS, RETRANSMIT_TIMEOUT * 1000)
+        except ConnectionRefusedError:
+            # Connected socket reporting an earlier ICMP port unreachable; treat as lost
+            pass
         except Exception as e:
-            print(f"[RETRANSMIT] Error resending packet R#{packet.seq_no}: {e}")
+            logger.error("[RETRANSMIT] Error resending packet R#%d: %s", packet.seq_no, e)
 
     def get_stats(self) -> dict:
         """Get channel statistics"""
-        with self.lock:
-            return self.stats.copy()
+        return {
+            'sent': self.sent_count,
+            'acked': self.acked_count,
+            'retransmitted': self.retransmitted_count,
+            'failed': self.failed_count,
+            'total_retries': self.total_retries,
+            'fast_retransmits': self.fast_retransmits
+        }
 
     def shutdown(self):
-        """Shutdown the retransmission timer"""
-        self.running = False
-        if self.timer_thread.is_alive():
-            self.timer_thread.join(timeout=1.0)
\ No newline at end of file
+        """Stop retransmitting; the owner's event loop stops calling tick()"""
+        self.running = False
\ No newline at end of file
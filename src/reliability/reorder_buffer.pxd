@@ -0,0 +1,30 @@
+# Augmenting declarations for reorder_buffer.py. The .py file is the only
+# implementation and runs unchanged as plain Python; compiling it with
+#   cythonize -i src/reliability/reorder_buffer.py
+# picks up these declarations and turns ReorderBuffer into a C extension type
+# with C-level fields and direct calls between its methods. The ring walk
+# indexes are typed below so slot lookups compile to direct list access.
+
+cimport cython
+
+cdef class ReorderBuffer:
+    cdef public int max_size
+    cdef public int expected_seq
+    cdef list _slots
+    cdef int _mask
+    cdef public int _count
+    cdef public Py_ssize_t delivered_count
+    cdef public Py_ssize_t reordered_count
+    cdef public Py_ssize_t skipped_count
+    cdef public object gap_deadline
+    cdef public int last_acked
+    cdef public object send_dup_ack
+    cdef public Py_ssize_t dup_ack_count
+    cdef list _ready
+
+    @cython.locals(gap=int, slot=int)
+    cpdef list add_packet(self, int seq_no, object packet)
+    @cython.locals(slots=list, mask=int, exp=int, drained=Py_ssize_t)
+    cdef Py_ssize_t _drain(self, list ready)
+    cpdef tuple ack_state(self)
+    cpdef list check_timeout(self)
@@ -1,17 +1,35 @@
+# cython: annotation_typing=False, boundscheck=False, wraparound=False
 """
 Reorder Buffer for Reliable Channel
 Handles out-of-order packet buffering and in-order delivery
 """
 
-from typing import Dict, List, Optional, Tuple
+from typing import List, NamedTuple, Optional, Tuple
+import logging
 import time
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from core.constants import REORDER_BUFFER_SIZE, REORDER_TIMEOUT
+from core.constants import REORDER_BUFFER_SIZE, REORDER_TIMEOUT, SACK_BITS
+
+logger = logging.getLogger(__name__)
+
+
+class ReorderStats(NamedTuple):
+    """Snapshot of ReorderBuffer counters"""
+    delivered: int
+    reordered: int
+    buffered: int
+    next_expected: int
+    skipped: int
+
 
 class ReorderBuffer:
+    __slots__ = ('max_size', 'expected_seq', '_slots', '_mask', '_count', 'delivered_count',
+                 'reordered_count', 'skipped_count', 'gap_deadline', 'last_acked',
+                 'send_dup_ack', 'dup_ack_count', '_ready')
+
     def __init__(self, max_size: int = REORDER_BUFFER_SIZE, send_dup_ack_callback=None):
         """
         Initialize reorder buffer for reliable packets with duplicate ACK support
@@ -22,14 +40,21 @@ class ReorderBuffer:
         """
         self.max_size = max_size
         self.expected_seq = 0  # Next expected sequence number
-        self.buffer: Dict[int, Tuple[object, float]] = {}  # {seq_no: (packet, timestamp)}
+        # Out-of-order packets in a power-of-two ring indexed by seq_no & _mask.
+        # Only seqs less than len(_slots) ahead of expected_seq are accepted, so
+        # each buffered seq owns its slot and the ring never needs a key check
+        size = 1 << max(max_size - 1, 1).bit_length()
+        self._slots: List[Optional[object]] = [None] * size
+        self._mask = size - 1
+        self._count = 0  # Occupied slots
         self.delivered_count = 0
         self.reordered_count = 0
         self.skipped_count = 0
-        self.gap_start_time = None  # Track when we first noticed a gap
+        self.gap_deadline = None  # When the current gap times out, None if no gap
         self.last_acked = -1  # Last in-order packet we ACKed
         self.send_dup_ack = send_dup_ack_callback  # Callback for duplicate ACKs
         self.dup_ack_count = 0  # Track duplicate ACKs sent
+        self._ready: List = []  # Result list reused by every add_packet call
 
     def add_packet(self, seq_no: int, packet) -> List:
         """
@@ -40,82 +65,135 @@ class ReorderBuffer:
             packet: The packet object
 
         Returns:
-            List of packets ready for in-order delivery
+            List of packets ready for in-order delivery. The same list is reused
+            by the next call, so the caller must consume it before then
         """
-        ready_packets = []
-        current_time = time.time()
+        ready_packets = self._ready
+        ready_packets.clear()
+
+        # Fast path: the expected packet with no gap open, which is nearly every
+        # packet on a healthy channel. Nothing can have timed out, so skip the clock
+        if seq_no == self.expected_seq and self.gap_deadline is None:
+            ready_packets.append(packet)
+            self.expected_seq = (seq_no + 1) & 0xFFFF
+            self.delivered_count += 1
+            self.last_acked = seq_no
+            if self._count:
+                self.reordered_count += self._drain(ready_packets)
+            return ready_packets
 
         # Check for timeout - skip missing packet if waiting too long
-        if self.gap_start_time and (current_time - self.gap_start_time) >= REORDER_TIMEOUT:
-            print(f"[REORDER] Timeout waiting for packet R#{self.expected_seq} "
-                  f"({REORDER_TIMEOUT*1000:.0f}ms threshold), skipping to continue")
+        if self.gap_deadline is not None and time.time() >= self.gap_deadline:
+            logger.warning("[REORDER] Timeout waiting for packet R#%d (%.0fms threshold), skipping to continue",
+                           self.expected_seq, REORDER_TIMEOUT * 1000)
             self.skipped_count += 1
-            self.expected_seq = (self.expected_seq + 1) % 65536
-            self.gap_start_time = None
+            self.expected_seq = (self.expected_seq + 1) & 0xFFFF
+            self.gap_deadline = None
 
             # Deliver any now-ready buffered packets
-            while self.expected_seq in self.buffer:
-                buffered_packet, _ = self.buffer[self.expected_seq]
-                ready_packets.append(buffered_packet)
-                del self.buffer[self.expected_seq]
-                self.expected_seq = (self.expected_seq + 1) % 65536
-                self.delivered_count += 1
+            self._drain(ready_packets)
+
+        # Forward distance from expected_seq modulo 65536 (RFC 1982 serial number
+        # arithmetic): 0 is the expected packet, the next half of the space is
+        # ahead and the rest is behind
+        gap = (seq_no - self.expected_seq) & 0xFFFF
 
         # If this is the expected packet
-        if seq_no == self.expected_seq:
+        if gap == 0:
             ready_packets.append(packet)
-            self.expected_seq = (self.expected_seq + 1) % 65536
+            self.expected_seq = (seq_no + 1) & 0xFFFF
             self.delivered_count += 1
-            self.gap_start_time = None  # Reset gap timer
+            self.gap_deadline = None  # Reset gap timer
             self.last_acked = seq_no  # Track last in-order packet
 
             # Check if buffered packets are now ready
-            while self.expected_seq in self.buffer:
-                buffered_packet, _ = self.buffer[self.expected_seq]
-                ready_packets.append(buffered_packet)
-                del self.buffer[self.expected_seq]
-                self.expected_seq = (self.expected_seq + 1) % 65536
-                self.delivered_count += 1
-                self.reordered_count += 1
-                print(f"[REORDER] Delivered buffered packet R#{self.expected_seq - 1} after gap filled")
+            self.reordered_count += self._drain(ready_packets)
 
         # If packet is ahead of expected (out-of-order)
-        elif self._is_ahead(seq_no):
-            if len(self.buffer) < self.max_size:
-                if seq_no not in self.buffer:  # Avoid duplicates
-                    self.buffer[seq_no] = (packet, current_time)
-                    gap = seq_no - self.expected_seq
-                    print(f"[REORDER] Buffering packet R#{seq_no}, expecting R#{self.expected_seq} (gap: {gap})")
+        elif gap < 0x8000:
+            if gap <= self._mask and self._count < self.max_size:
+                slot = seq_no & self._mask
+                if self._slots[slot] is None:  # Avoid duplicates
+                    self._slots[slot] = packet
+                    self._count += 1
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("[REORDER] Buffering packet R#%d, expecting R#%d (gap: %d)",
+                                     seq_no, self.expected_seq, gap)
 
                     # Start gap timer if not already started
-                    if self.gap_start_time is None:
-                        self.gap_start_time = current_time
+                    if self.gap_deadline is None:
+                        self.gap_deadline = time.time() + REORDER_TIMEOUT
 
                     # Send duplicate ACK for last in-order packet (Selective Repeat standard)
                     if self.send_dup_ack and self.last_acked >= 0:
                         self.send_dup_ack(self.last_acked)
                         self.dup_ack_count += 1
-                        print(f"[DUP-ACK] Sent duplicate ACK for R#{self.last_acked} (gap detected at R#{seq_no})")
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("[DUP-ACK] Sent duplicate ACK for R#%d (gap detected at R#%d)",
+                                         self.last_acked, seq_no)
             else:
-                print(f"[REORDER] Buffer full ({self.max_size}), dropping packet R#{seq_no}")
+                logger.warning("[REORDER] Buffer full (%d packets, window %d), dropping packet R#%d",
+                               self.max_size, len(self._slots), seq_no)
 
         # If packet is behind expected (late duplicate)
         else:
-            print(f"[REORDER] Ignoring late/duplicate packet R#{seq_no}, expecting R#{self.expected_seq}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("[REORDER] Ignoring late/duplicate packet R#%d, expecting R#%d",
+                             seq_no, self.expected_seq)
 
         return ready_packets
 
-    def _is_ahead(self, seq_no: int) -> bool:
+    def _drain(self, ready: List) -> int:
+        """
+        Move buffered packets that continue the in-order run onto ready,
+        advancing expected_seq past them
+
+        Returns:
+            Number of packets delivered
         """
-        Check if sequence number is ahead of expected (handling wraparound)
+        slots, mask = self._slots, self._mask
+        exp = self.expected_seq
+        drained = 0
+        while slots[exp & mask] is not None:
+            ready.append(slots[exp & mask])
+            slots[exp & mask] = None
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("[REORDER] Delivered buffered packet R#%d", exp)
+            exp = (exp + 1) & 0xFFFF
+            drained += 1
+        # Written back once after the walk
+        self.expected_seq = exp
+        self._count -= drained
+        self.delivered_count += drained
+        return drained
+
+    def ack_state(self) -> Tuple[int, int]:
         """
-        # Handle sequence number wraparound at 65536
-        if self.expected_seq < 32768:
-            # Expected is in first half
-            return seq_no > self.expected_seq and seq_no < self.expected_seq + 32768
-        else:
-            # Expected is in second half
-            return seq_no > self.expected_seq or seq_no < (self.expected_seq - 32768)
+        Cumulative and selective ACK describing what has been received
+
+        Returns:
+            (cum_ack, sack_bitmap): cum_ack is the last sequence number delivered
+            in order; bit i of sack_bitmap is set if cum_ack + 2 + i is buffered
+        """
+        cum_ack = (self.expected_seq - 1) % 65536
+        sack_bitmap = 0
+        if self._count:
+            # expected_seq itself is the hole, so the bitmap starts just past it
+            slots, mask = self._slots, self._mask
+            base = self.expected_seq + 1
+            for offset in range(min(SACK_BITS, mask)):
+                if slots[(base + offset) & mask] is not None:
+                    sack_bitmap |= 1 << offset
+        return cum_ack, sack_bitmap
+
+    def next_timeout(self) -> Optional[float]:
+        """
+        Seconds until the current gap times out (0 if already overdue),
+        or None if no gap is being waited on
+        """
+        if self.gap_deadline is None:
+            return None
+        return max(0.0, self.gap_deadline - time.time())
 
     def check_timeout(self) -> List:
         """
@@ -123,38 +201,34 @@ class ReorderBuffer:
         Called periodically to handle gaps that exceed threshold
         """
         ready_packets = []
-        current_time = time.time()
 
-        if self.gap_start_time and (current_time - self.gap_start_time) >= REORDER_TIMEOUT:
-            print(f"[REORDER] Timeout waiting for packet R#{self.expected_seq} "
-                  f"({REORDER_TIMEOUT*1000:.0f}ms threshold), skipping to continue")
+        if self.gap_deadline is not None and time.time() >= self.gap_deadline:
+            logger.warning("[REORDER] Timeout waiting for packet R#%d (%.0fms threshold), skipping to continue",
+                           self.expected_seq, REORDER_TIMEOUT * 1000)
             self.skipped_count += 1
-            self.expected_seq = (self.expected_seq + 1) % 65536
-            self.gap_start_time = None
+            self.expected_seq = (self.expected_seq + 1) & 0xFFFF
+            self.gap_deadline = None
 
             # Deliver any now-ready buffered packets
-            while self.expected_seq in self.buffer:
-                buffered_packet, _ = self.buffer[self.expected_seq]
-                ready_packets.append(buffered_packet)
-                del self.buffer[self.expected_seq]
-                self.expected_seq = (self.expected_seq + 1) % 65536
-                self.delivered_count += 1
+            self._drain(ready_packets)
 
         return ready_packets
 
-    def get_stats(self) -> dict:
+    def get_stats(self) -> ReorderStats:
         """Get reordering statistics"""
-        return {
-            'delivered': self.delivered_count,
-            'reordered': self.reordered_count,
-            'buffered': len(self.buffer),
-            'next_expected': self.expected_seq,
-            'skipped': self.skipped_count
-        }
+        return ReorderStats(self.delivered_count, self.reordered_count, self._count,
+                            self.expected_seq, self.skipped_count)
 
     def reset(self):
-        """Reset buffer state"""
+        """Reset buffer state to that of a freshly constructed buffer"""
         self.expected_seq = 0
-        self.buffer.clear()
+        self._slots[:] = [None] * len(self._slots)
+        self._count = 0
         self.delivered_count = 0
-        self.reordered_count = 0
\ No newline at end of file
+        self.reordered_count = 0
+        self.skipped_count = 0
+        self.gap_deadline = None
+        self.last_acked = -1
+        self.dup_ack_count = 0
+        self._ready.clear()
+
@@ -0,0 +1,136 @@
+import os
+import socket
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.core.constants import CHANNEL_RELIABLE, CHANNEL_UNRELIABLE, DUP_ACK_THRESHOLD, MAX_DATAGRAM_SIZE
+from src.core.game_net_api import GameNetAPI
+from src.core.packet import GamePacket, build_ack_bytes
+
+
+class HandleAckTest(unittest.TestCase):
+    def setUp(self):
+        self.api = GameNetAPI(port=18888, target_port=18889)
+
+    def tearDown(self):
+        self.api.close()
+
+    def test_ack_arriving_before_send_returns(self):
+        """A cumulative ACK that races ahead of send() still acknowledges the packet"""
+        api = self.api
+
+        def send_and_ack(data):
+            # The peer's ACK is handled before _send returns, as on a fast loopback path
+            seq_no = GamePacket.from_bytes(data).seq_no
+            api._handle_ack(GamePacket.create_ack(seq_no), 0)
+
+        api._send = send_and_ack
+        for i in range(3):
+            api.send(f"packet {i}", reliable=True)
+
+        stats = api.reliable_channel.get_stats()
+        self.assertEqual(stats['acked'], 3)
+        self.assertIsNone(api.reliable_channel.next_deadline())
+        self.assertEqual(api.last_acked_seq, 2)
+
+    def test_stale_ack_changes_nothing_but_its_sack_bits(self):
+        """An ACK older than last_acked_seq neither rewinds it nor counts as a duplicate"""
+        api = self.api
+        channel = api.reliable_channel
+        for seq_no in range(10):
+            channel.track_packet(b"packet", seq_no, api._target)
+
+        api._handle_ack(GamePacket.from_bytes(build_ack_bytes(5)), 0)
+        self.assertEqual(channel.get_stats()['acked'], 6)
+
+        # Reordered ACK from before cum 5, whose bitmap also covers 7 (3 + 2 + 2)
+        api._handle_ack(GamePacket.from_bytes(build_ack_bytes(3, 0b100)), 0)
+        self.assertEqual(api.last_acked_seq, 5)
+        self.assertEqual(channel.get_stats()['acked'], 7)
+        self.assertEqual(channel.dup_ack_count, {})
+        self.assertIsNotNone(channel.next_deadline())
+
+        # Wrapped comparison: 65535 is behind 5, not ahead of it
+        api._handle_ack(GamePacket.from_bytes(build_ack_bytes(65535)), 0)
+        self.assertEqual(api.last_acked_seq, 5)
+        self.assertEqual(channel.get_stats()['acked'], 7)
+        self.assertEqual(channel.dup_ack_count, {})
+
+
+class DuplicateAckTest(unittest.TestCase):
+    def setUp(self):
+        self.api = GameNetAPI(port=18888, target_port=18889)
+        self.acks = []
+        self.api._ack_batch = None
+        self.api._send = self.acks.append
+
+    def tearDown(self):
+        self.api.close()
+
+    def receive(self, *seq_nos):
+        """Hand reliable packets to the receive path as one batch"""
+        batch = [(GamePacket(CHANNEL_RELIABLE, seq_no, f"packet {seq_no}").to_bytes(), ("127.0.0.1", 18889))
+                 for seq_no in seq_nos]
+        self.api._process_batch(batch)
+
+    def sent_acks(self):
+        return [(ack.ack_seq, ack.sack_bitmap) for ack in map(GamePacket.from_bytes, self.acks)]
+
+    def test_batch_past_threshold_sends_one_sack_ack(self):
+        """Past DUP_ACK_THRESHOLD duplicates, the rest of a batch shares one ACK carrying its SACK bits"""
+        self.receive(0)
+        self.receive(*range(2, 10))
+        # Bit i of the bitmap is cum_ack + 2 + i, so seqs 2..9 are bits 0..7
+        self.assertEqual(self.sent_acks(), [(0, 0), (0, 0b1), (0, 0b11), (0, 0b111), (0, 0xFF)])
+
+        # A repeat of a buffered packet has nothing new to report
+        self.receive(5)
+        self.assertEqual(len(self.acks), 5)
+
+        self.receive(1)
+        self.assertEqual(self.sent_acks()[-1], (9, 0))
+
+    def test_late_duplicate_always_acked(self):
+        """Without a gap, repeats of the cumulative point answer retransmissions and are never dropped"""
+        self.receive(0)
+        for _ in range(DUP_ACK_THRESHOLD + 2):
+            self.receive(0)
+        self.assertEqual(self.sent_acks(), [(0, 0)] * (DUP_ACK_THRESHOLD + 3))
+
+    def test_sender_fast_retransmits_when_gap_shares_batch_with_in_order(self):
+        """The first ACK with a new cumulative point is not a duplicate to the sender"""
+        sender = GameNetAPI(port=18890, target_port=18891)
+        self.addCleanup(sender.close)
+        sender._ack_batch = None
+        for seq_no in range(10):
+            sender.reliable_channel.track_packet(b"packet", seq_no, sender._target)
+
+        for batch in ((0, 1, 2, 3), (4, 6, 7, 8), (9,)):
+            start = len(self.acks)
+            self.receive(*batch)
+            sender._process_batch([(ack, ("127.0.0.1", 18888)) for ack in self.acks[start:]])
+
+        self.assertEqual(sender.reliable_channel.fast_retransmits, 1)
+        # 5 was fast-retransmitted; everything the receiver holds is acknowledged
+        self.assertEqual(sender.reliable_channel.get_stats()['acked'], 9)
+
+
+
+class OversizedDatagramTest(unittest.TestCase):
+    def test_truncated_datagram_dropped(self):
+        """A datagram longer than MAX_DATAGRAM_SIZE is dropped, not delivered cut short"""
+        api = GameNetAPI(port=18892, target_port=18893)
+        self.addCleanup(api.close)
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto(GamePacket(CHANNEL_UNRELIABLE, 0, "x" * MAX_DATAGRAM_SIZE).to_bytes(),
+                        ("127.0.0.1", 18892))
+            sock.sendto(GamePacket(CHANNEL_UNRELIABLE, 1, "small").to_bytes(), ("127.0.0.1", 18892))
+            packet = api.receive(timeout=1.0)
+        self.assertEqual((packet.seq_no, packet.payload), (1, "small"))
+        self.assertIsNone(api.receive(timeout=0.1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.core.packet import GamePacket, KIND_ACK, build_ack_bytes
+
+
+class AckPacketTest(unittest.TestCase):
+    def test_plain_ack_has_empty_bitmap(self):
+        packet = GamePacket.from_bytes(build_ack_bytes(10))
+        self.assertEqual(packet.kind, KIND_ACK)
+        self.assertEqual(packet.ack_seq, 10)
+        self.assertEqual(packet.sack_bitmap, 0)
+
+    def test_sack_bitmap_round_trip(self):
+        for bitmap in (0b1, 0b1011, 0x80000000, 0xFFFFFFFF):
+            packet = GamePacket.from_bytes(build_ack_bytes(65535, bitmap))
+            self.assertEqual(packet.kind, KIND_ACK)
+            self.assertEqual(packet.ack_seq, 65535)
+            self.assertEqual(packet.sack_bitmap, bitmap)
+
+    def test_create_ack_has_empty_bitmap(self):
+        self.assertEqual(GamePacket.create_ack(7).sack_bitmap, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
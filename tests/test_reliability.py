@@ -0,0 +1,71 @@
+import os
+import socket
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.core.constants import PENDING_RING_SIZE
+from src.reliability.reliable_channel import ReliableChannel
+from src.reliability.reorder_buffer import ReorderBuffer
+
+
+class SelectiveAckTest(unittest.TestCase):
+    def setUp(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.channel = ReliableChannel(self.sock)
+
+    def tearDown(self):
+        self.sock.close()
+
+    def track(self, seqs):
+        for seq_no in seqs:
+            self.channel.track_packet(b"packet", seq_no, ("127.0.0.1", 9))
+
+    def pending(self, seqs):
+        return [seq_no for seq_no in seqs if self.channel._pending(seq_no) is not None]
+
+    def test_bitmap_matches_channel(self):
+        """Bit i of ack_state's bitmap is cum_ack + 2 + i, as acknowledge_cumulative reads it"""
+        rb = ReorderBuffer()
+        rb.add_packet(0, "p0")
+        for seq_no in (2, 3, 5, 33):
+            rb.add_packet(seq_no, f"p{seq_no}")
+        cum_ack, bitmap = rb.ack_state()
+        self.assertEqual(cum_ack, 0)
+        self.assertEqual(bitmap, 0b1 | 0b10 | 0b1000 | 1 << 31)
+
+        seqs = list(range(34))
+        self.track(seqs)
+        self.assertEqual(self.channel.acknowledge_cumulative(0, cum_ack, bitmap), 5)
+        self.assertEqual(self.pending(seqs), [s for s in seqs if s not in (0, 2, 3, 5, 33)])
+
+    def test_bitmap_wraps_past_65535(self):
+        rb = ReorderBuffer()
+        rb.expected_seq = 65534  # cum_ack 65533; 65534 is the hole
+        for seq_no in (65535, 0, 1, 3):
+            rb.add_packet(seq_no, f"p{seq_no}")
+        cum_ack, bitmap = rb.ack_state()
+        self.assertEqual(cum_ack, 65533)
+        self.assertEqual(bitmap, 0b10111)
+
+        seqs = list(range(65530, 65536)) + list(range(5))
+        self.track(seqs)
+        self.assertEqual(self.channel.acknowledge_cumulative(65530, cum_ack, bitmap), 8)
+        self.assertEqual(self.pending(seqs), [65534, 2, 4])
+
+
+
+class PendingRingTest(unittest.TestCase):
+    def test_displaced_packet_counts_as_failed(self):
+        """A packet pushed out of a full pending ring shows up in failed_count"""
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            channel = ReliableChannel(sock)
+            for seq_no in range(PENDING_RING_SIZE + 3):
+                channel.track_packet(b"packet", seq_no, ("127.0.0.1", 9))
+            self.assertEqual(channel.get_stats()['failed'], 3)
+            self.assertIsNone(channel._pending(0))
+
+
+if __name__ == "__main__":
+    unittest.main()